@@ -21,10 +21,15 @@
 """
 
 import socket
+import select
+import ctypes
+import ctypes.util
+import errno
 from struct import pack
 from sys import exit
-from os import path
-from Sprinkler.global_variables import MCAST_GRP, MCAST_PORT, MCAST_TTL
+from os import path, strerror
+from Sprinkler.global_variables import MCAST_GRP, MCAST_PORT, MCAST_TTL, \
+    MCAST_SNDBUF
 import logging
 
 # Central Logging Entity
@@ -42,6 +47,47 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
+class iovec(ctypes.Structure):
+    """struct iovec from <sys/uio.h>"""
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    """struct msghdr from <sys/socket.h>"""
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(iovec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class mmsghdr(ctypes.Structure):
+    """struct mmsghdr from <sys/socket.h> (Linux only)"""
+    _fields_ = [('msg_hdr', msghdr),
+                ('msg_len', ctypes.c_uint)]
+
+
+# sendmmsg(2) from libc if available
+# - otherwise batches are sent one datagram at a time
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                        use_errno=True)
+    _sendmmsg = _libc.sendmmsg
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr),
+                          ctypes.c_uint, ctypes.c_int]
+    _sendmmsg.restype = ctypes.c_int
+
+except (OSError, AttributeError):
+    _sendmmsg = None
+
+# Sends must not block the socket, which is shared with the
+# blocking receive of the Bucket
+SEND_FLAGS = getattr(socket, 'MSG_DONTWAIT', 0)
+
+
 class Socket:
     """IPv6 Multicast socket Wrapper Class
     """
@@ -58,6 +104,10 @@ class Socket:
             # Multiusablity -- Optional
             sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
+            # Send Buffer large enough for a Fountain burst
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF,
+                            MCAST_SNDBUF)
+
             logger.info("Socket Created..")
 
         except socket.error as sockErr:
@@ -68,6 +118,9 @@ class Socket:
         else:
             self.sock = sock
 
+            # Resolved destinations: (host, port) -> struct sockaddr_in6
+            self.sockaddrs = {}
+
     def bindSock(self, host='', port=MCAST_PORT):
         """socket binding method"""
 
@@ -107,11 +160,78 @@ class Socket:
             self.sock.closeSock()
             exit()
 
+    def sockaddr(self, host, port):
+        """struct sockaddr_in6 for a destination, resolved only once"""
+
+        if (host, port) not in self.sockaddrs:
+            raw = pack('@H', socket.AF_INET6) + pack('!HI', port, 0) + \
+                socket.inet_pton(socket.AF_INET6, host) + pack('@I', 0)
+            self.sockaddrs[host, port] = \
+                ctypes.create_string_buffer(raw, len(raw))
+
+        return self.sockaddrs[host, port]
+
+    def waitWritable(self):
+        """Block until the send buffer has room again"""
+        select.select([], [self.sock], [])
+
     def send(self, message, host=MCAST_GRP, port=MCAST_PORT):
         """socket send method"""
         try:
             # Send data to ff02::1 and 30001 port
-            self.sock.sendto(message, (host, port))
+            while True:
+                try:
+                    self.sock.sendto(message, SEND_FLAGS, (host, port))
+                    break
+                except BlockingIOError:
+                    self.waitWritable()
+
+        except socket.error as sockErr:
+
+            logger.error("Sending Failed..")
+            raise sockErr
+            self.sock.closeSock()
+            exit()
+
+    def sendBatch(self, messages, host=MCAST_GRP, port=MCAST_PORT):
+        """socket send method for a list of messages
+
+        Hands all messages to the kernel with a single sendmmsg(2)
+        call where available, else falls back to one send per message.
+        """
+        try:
+            if _sendmmsg is None or len(messages) == 1:
+                for message in messages:
+                    self.send(message, host, port)
+                return
+
+            dest = self.sockaddr(host, port)
+
+            count = len(messages)
+            iovs = (iovec * count)()
+            msgs = (mmsghdr * count)()
+
+            for i, message in enumerate(messages):
+                iovs[i].iov_base = ctypes.cast(ctypes.c_char_p(message),
+                                               ctypes.c_void_p)
+                iovs[i].iov_len = len(message)
+                msgs[i].msg_hdr.msg_name = ctypes.addressof(dest)
+                msgs[i].msg_hdr.msg_namelen = len(dest)
+                msgs[i].msg_hdr.msg_iov = ctypes.pointer(iovs[i])
+                msgs[i].msg_hdr.msg_iovlen = 1
+
+            # sendmmsg may send less than asked for
+            sent = 0
+            while sent < count:
+                ret = _sendmmsg(self.sock.fileno(), ctypes.byref(msgs[sent]),
+                                count - sent, SEND_FLAGS)
+                if ret < 0:
+                    err = ctypes.get_errno()
+                    if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        self.waitWritable()
+                        continue
+                    raise OSError(err, strerror(err))
+                sent += ret
 
         except socket.error as sockErr:
 
@@ -24,10 +24,12 @@
 
 import Sprinkler.global_variables as gv
 from lt import decode
-from struct import pack, unpack
-from Sprinkler.fountain import CheckConsistency
+from struct import unpack, unpack_from
+from Sprinkler.fountain import CheckConsistency, FounParameters, \
+    VERSION_STRUCT
 from os import chdir, path
 from Sprinkler.route import addRoute
+from Sprinkler.droplet import HEADERSIZE
 import sys
 import socket
 import logging
@@ -84,6 +86,28 @@ def open_next_file(aDecoder, template='incomingData{}.tar'):
     return template.format(serial)
 
 
+def splitDroplets(data):
+    """
+    splitDroplets: Split a datagram into its LT-Droplets.
+
+    @type data: bytes object
+    @param data: datagram received from a Fountain
+
+    @rtype: list
+    @return: Droplets of |Header + Block + Version|
+
+    Description:
+        A Fountain packs several Droplets into one datagram if they
+        fit. All have the same length, read from the blocksize field
+        of the first LT-header. A truncated tail is dropped.
+    """
+
+    stride = HEADERSIZE + unpack_from('!I', data, 4)[0] + VERSION_STRUCT.size
+
+    return [data[i:i + stride]
+            for i in range(0, len(data) - stride + 1, stride)]
+
+
 def bucket():
     """
     bucket: Main function for hearing OTA Versions and Firmware.
@@ -95,6 +119,7 @@ def bucket():
     Message Types:
         TrickleMessage: 2 Bytes of Version number
         Droplets: (Header+BlockSize) of LT-encoder + 2 B footer for Version
+                  one or more per datagram
     """
 
     logger.info("Bucket state on..")
@@ -123,7 +148,7 @@ def bucket():
                 # - this is trickleMessage
 
                 theirVersion = unpack('!H', data)[0]
-                logger.info("Version Check for %s" % recvAddr)
+                logger.info("Version Check for %s", recvAddr)
                 # store the IP address of Trickle Neighbor
 
                 addRoute(foun=None, neigh=recvAddr)
@@ -133,15 +158,12 @@ def bucket():
             elif len(data) > gv.BLOCKSIZE:
                 # If length of the data more than
                 # Blocksize then this is a
-                # -LT-droplet
-
-                receivedDroplets += 1
-
-                droplet = data
+                # -LT-droplet (or several of them)
 
                 # Strip the Footer for Version
                 # of Fountain
-                footer = droplet[-2:]
+                # - same for all Droplets of a datagram
+                footer = data[-2:]
 
                 # fountain's version
                 founVersion = unpack('!H', footer)[0]
@@ -149,27 +171,43 @@ def bucket():
                 if gv.VERSION == founVersion:
                     # If my Version and Fountain's version
                     # is Same. Do nothing.
-                    pass
+                    receivedDroplets += 1
 
                 elif founVersion < gv.VERSION:
                     # If Someone else is spraying an older
                     # Found become inconsistent and make
                     # Things Right..
                     # This is particularly useful for Server
+                    receivedDroplets += 1
 
                     gv.tt.hear_inconsistent()
                 else:
                     # Else Definitely this is a new OTA data
                     # feed the block to the decoder
 
-                    # use this API (a wrapper around next())
+                    decoded = False
+
+                    for droplet in splitDroplets(data):
+
+                        receivedDroplets += 1
+
+                        # use this API (a wrapper around next())
+
+                        lt_block = decode.block_from_bytes(droplet)
 
-                    lt_block = decode.block_from_bytes(droplet)
+                        # Increase the consumption counter
+                        # if the Droplet does not decode the file
+                        # it was still consumed by the Generator
+                        # if it does, it is the Block that decodes it all
+                        consumedBlocks += 1
 
-                    if decoder.consume_block(lt_block):
-                        # Try creating a Bipartite Graph
-                        # And Decode the file
+                        if decoder.consume_block(lt_block):
+                            # Try creating a Bipartite Graph
+                            # And Decode the file
+                            decoded = True
+                            break
 
+                    if decoded:
                         # If we find the best combination
                         # Dump the data to a file for further
                         # Usage
@@ -177,33 +215,23 @@ def bucket():
 
                         logger.info("writing file")
 
-                        # This is the Block that decodes it all
-                        # hence increase the consumption counter
-                        consumedBlocks += 1
-
                         # Change to Target Folder
                         chdir(gv.PATH)
 
                         # Dump the Data into a new File template
-                        # Automatically and assign value to the
-                        # Global Filename variable
-                        gv.FILENAME = open_next_file(decoder)
+                        # Automatically, the Global Filename variable
+                        # is assigned once the Fountain Parameters are
+                        newFile = open_next_file(decoder)
 
-                        logger.debug("Total Droplets Consumed:%d"
-                                     % consumedBlocks)
-                        logger.debug("Total Droplets Received:%d"
-                                     % receivedDroplets)
+                        logger.debug("Total Droplets Consumed:%d",
+                                     consumedBlocks)
+                        logger.debug("Total Droplets Received:%d",
+                                     receivedDroplets)
 
                         # Store the Fountain address in routeTable.json
                         addRoute(foun=recvAddr, neigh=None)
                         break
 
-                    # Increase the consumption counter
-                    # if this increases it means that
-                    # the Droplet in the Generator
-                    # wasn't the one to decode the file
-                    consumedBlocks += 1
-
     except socket.error as sockErr:
         logger.error("Error While Listening on Socket")
         raise sockErr
@@ -215,12 +243,17 @@ def bucket():
         # Pack the new version and send out
         # a TrickleMessage
 
+        # Fountain Parameters for the new File
+        # before it becomes the Global Filename
+        gv.K, gv.GAMMA = FounParameters(newFile, gv.BLOCKSIZE)
+        gv.FILENAME = newFile
+
         gv.VERSION = founVersion
-        logger.debug("Version Updated: %d" % gv.VERSION)
+        logger.debug("Version Updated: %d", gv.VERSION)
 
         # Pack the newly update Version and trigger an
         # Inconsistency for faster response to the sending source
-        setattr(gv.tt, 'kwargs', {'message': pack('!H', gv.VERSION)})
+        gv.tt.kwargs = {'message': VERSION_STRUCT.pack(gv.VERSION)}
 
         # Be quick as Possible to share your new Version!
         gv.tt.hear_inconsistent()
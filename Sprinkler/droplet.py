@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+
+# TWIN node - A Flexible Testbed for Wireless Sensor Networks
+# Copyright (C) 2016, Communication Networks, University of Bremen, Germany
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>
+#
+# This file is part of TWIN
+
+"""Droplet Module for Sprinkler.
+   LT-encoding of Source Blocks in compiled kernels, wire compatible
+   with lt.encode.encoder
+"""
+
+from lt import encode, sampler
+from random import randint
+from struct import Struct
+
+# numpy and numba are optional
+# - without numba the Droplets are XORed with numpy
+# - without numpy the pure Python lt.encode.encoder is used
+try:
+    import numpy as np
+
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+
+except ImportError:
+    njit = None
+
+# LT-Block header: filesize, blocksize, blockseed
+_HEADER_STRUCT = Struct('!III')
+HEADERSIZE = _HEADER_STRUCT.size
+
+# Number of Droplets encoded per kernel call
+CHUNKSIZE = 64
+
+# Cache for the Robust Soliton CDF: (K, delta, c) -> ndarray
+_cdfCache = {}
+
+# Cache for the lt.sampler PRNG: K -> PRNG
+_prngCache = {}
+
+# Constants of the lt.sampler PRNG
+_PRNG_A = sampler.PRNG_A
+_PRNG_M = sampler.PRNG_M
+_PRNG_MAX = sampler.PRNG_MAX_RAND
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _sampleBlocks(cdf, k, state, count):
+        """Replicates lt.sampler.PRNG.get_src_blocks() count times
+
+        Returns the block seeds, the flattened source block indices and
+        the offsets of each Droplet's indices, as well as the next state.
+        """
+
+        seeds = np.empty(count, np.int64)
+        offsets = np.empty(count + 1, np.int64)
+        idx = np.empty(count * 8, np.int64)
+        seen = np.zeros(k, np.bool_)
+
+        n = 0
+        offsets[0] = 0
+        for i in range(count):
+            seeds[i] = state
+
+            # Degree from the Robust Soliton CDF
+            state = _PRNG_A * state % _PRNG_M
+            p = state / _PRNG_MAX
+            d = k
+            for ix in range(k):
+                if cdf[ix] > p:
+                    d = ix + 1
+                    break
+
+            if n + d > idx.shape[0]:
+                grown = np.empty(2 * idx.shape[0] + d, np.int64)
+                grown[:n] = idx[:n]
+                idx = grown
+
+            # d distinct Source Blocks
+            have = 0
+            while have < d:
+                state = _PRNG_A * state % _PRNG_M
+                num = state % k
+                if not seen[num]:
+                    seen[num] = True
+                    idx[n + have] = num
+                    have += 1
+
+            for j in range(n, n + d):
+                seen[idx[j]] = False
+
+            n += d
+            offsets[i + 1] = n
+
+        return seeds, idx[:n], offsets, state
+
+    @njit(cache=True, nogil=True)
+    def _xorBlocks(src, idx, offsets, out):
+        """XOR the selected rows of src into each row of out"""
+
+        for i in range(out.shape[0]):
+            first = idx[offsets[i]]
+            for b in range(out.shape[1]):
+                out[i, b] = src[first, b]
+
+            for j in range(offsets[i] + 1, offsets[i + 1]):
+                row = idx[j]
+                for b in range(out.shape[1]):
+                    out[i, b] ^= src[row, b]
+
+
+def rsdCDF(k, delta=sampler.DEFAULT_DELTA, c=sampler.DEFAULT_C):
+    """
+    rsdCDF: Robust Soliton CDF as used by the LT-Decoder
+
+    @type k: unsigned int
+    @param k: number of Source Blocks
+
+    Description:
+        lt.sampler.gen_rsd_cdf is quadratic in K, hence the result is
+        cached. It is not recomputed with numpy since the receivers
+        sample from the exact same floating point values.
+    """
+
+    key = (k, delta, c)
+    if key not in _cdfCache:
+        _cdfCache[key] = np.array(sampler.gen_rsd_cdf(k, delta, c))
+
+    return _cdfCache[key]
+
+
+def rsdPRNG(k):
+    """
+    rsdPRNG: lt.sampler.PRNG for K Source Blocks
+
+    @type k: unsigned int
+    @param k: number of Source Blocks
+
+    Description:
+        Used when numba is not available. Construction computes the
+        Robust Soliton CDF, hence instances are cached per K.
+    """
+
+    if k not in _prngCache:
+        _prngCache[k] = sampler.PRNG(
+            params=(k, sampler.DEFAULT_DELTA, sampler.DEFAULT_C))
+
+    return _prngCache[k]
+
+
+def warmUp():
+    """
+    warmUp: Compile the kernels ahead of the first Fountain
+
+    Description:
+        Without this the first Fountain pays the numba compilation
+        (or the load from its cache) on the Trickle Timer thread.
+    """
+
+    if njit is None:
+        return
+
+    src = np.zeros((2, 1), np.uint8)
+    seeds, idx, offsets, state = _sampleBlocks(rsdCDF(2), 2, 1, 1)
+    _xorBlocks(src, idx, offsets, np.empty((1, 1), np.uint8))
+
+
+def sourceBlocks(f, blocksize):
+    """
+    sourceBlocks: Load the Target File as a (K, blocksize) array
+
+    @type f: file object
+    @param f: opened Target File
+
+    @type blocksize: unsigned int
+    @param blocksize: Blocksize of each Source Block
+
+    @rtype: tuple
+    @return: size of the file in Bytes and the array of Source Blocks
+
+    Description:
+        The file is read straight into one contiguous uint8 array,
+        row i being Source Block i. The last Block is padded with b'0'
+        like encode._split_file, which builds one int per Block instead.
+    """
+
+    start = f.tell()
+    fileSize = f.seek(0, 2) - start
+    f.seek(start)
+
+    k = -(-fileSize // blocksize)
+    src = np.empty((k, blocksize), np.uint8)
+    flat = memoryview(src.reshape(-1))
+
+    have = 0
+    while have < fileSize:
+        n = f.readinto(flat[have:fileSize])
+        if not n:
+            break
+        have += n
+
+    src.reshape(-1)[have:] = ord('0')
+
+    return fileSize, src
+
+
+def encoder(f, blocksize, seed=None):
+    """
+    encoder: Generator of LT-encoded Blocks
+
+    @type f: file object
+    @param f: opened Target File
+
+    @type blocksize: unsigned int
+    @param blocksize: Blocksize of each encoded Block
+
+    @type seed: int
+    @param seed: initial state of the PRNG
+
+    @default seed: random
+
+    Description:
+        Drop-in for lt.encode.encoder. Source Blocks are loaded into a
+        (K, blocksize) array, CHUNKSIZE Droplets are sampled and XORed
+        per call of the compiled kernels and yielded as packed blocks.
+        Without numba each Droplet is a np.bitwise_xor.reduce over the
+        rows picked by lt.sampler.
+    """
+
+    if np is None:
+        yield from encode.encoder(f, blocksize, seed)
+        return
+
+    if seed is None:
+        seed = randint(1, _PRNG_MAX)
+
+    fileSize, src = sourceBlocks(f, blocksize)
+    k = src.shape[0]
+
+    if njit is None:
+        prng = rsdPRNG(k)
+        prng.set_seed(seed)
+
+        while True:
+            blockseed, d, ix_samples = prng.get_src_blocks()
+            yield _HEADER_STRUCT.pack(fileSize, blocksize, blockseed) + \
+                np.bitwise_xor.reduce(src[list(ix_samples)], axis=0).tobytes()
+
+    cdf = rsdCDF(k)
+    state = seed
+    out = np.empty((CHUNKSIZE, blocksize), np.uint8)
+
+    while True:
+        seeds, idx, offsets, state = _sampleBlocks(cdf, k, state, CHUNKSIZE)
+        _xorBlocks(src, idx, offsets, out)
+
+        for i in range(CHUNKSIZE):
+            yield _HEADER_STRUCT.pack(fileSize, blocksize, seeds[i]) + \
+                out[i].tobytes()
@@ -20,14 +20,17 @@
 """Fountain Module for Sprinkler. Data Dissemention module
 """
 
-from lt import encode
 from lt.sampler import DEFAULT_DELTA
-from struct import pack
-from math import log, sqrt
+from struct import Struct
+from math import ceil, log, sqrt
 import Sprinkler.global_variables as gv
-import datetime
+from Sprinkler.droplet import encoder, HEADERSIZE
+from Sprinkler.Socket import SEND_FLAGS
+from time import monotonic
+from threading import Event, Thread
+from queue import Queue
 import socket
-from os import chdir, path
+from os import path, stat, fstat
 import logging
 
 # Central Logging Entity
@@ -44,6 +47,23 @@ formatter = logging.Formatter(
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+# Pre-compiled format for the 2B Version
+# - footer of each Droplet and TrickleMessage alike
+VERSION_STRUCT = Struct('!H')
+
+# Destination of all Droplets
+_MCAST_ADDR = (gv.MCAST_GRP, gv.MCAST_PORT)
+
+# Batches of Droplets buffered between encoding and sending
+QUEUESIZE = 4
+
+# Cache for Fountain Parameters
+# (fname, bsize, mtime, size) -> (K, Gamma)
+_founCache = {}
+
+# Version for which the Cache is valid
+_founCacheVersion = gv.VERSION
+
 
 def addFooter(encodedBlock, version):
     """
@@ -64,11 +84,11 @@ def addFooter(encodedBlock, version):
     """
 
     # Concatenate 2B of Version to the Block
-    packedData = encodedBlock + pack('!H', version)
+    packedData = encodedBlock + VERSION_STRUCT.pack(version)
     return packedData
 
 
-def FounParameters(fname=gv.FILENAME, bsize=gv.BLOCKSIZE):
+def FounParameters(fname=gv.FILENAME, bsize=gv.BLOCKSIZE, f=None):
     """
     FounParameters: Get Parameters for Fountain Control
 
@@ -78,34 +98,50 @@ def FounParameters(fname=gv.FILENAME, bsize=gv.BLOCKSIZE):
     @type bsize: unsigned int
     @param bsize: block size to create a LT-Droplet
 
+    @type f: file object
+    @param f: already opened handle of fname, saves a lookup of the path
+
     @default fname: filename from global_variables
     @default bsize: block size from global_variables
+    @default f: None
 
     Description:
         Function give out the 'Controlling Parameters' of the Fountain
         K = Number of Blocks generated
         Gamma = Bound of how many more packets would be needed to decode
             the file Completely.
+        Values are cached until the file, blocksize or Version changes.
     """
 
-    # Change to Target Path
-    chdir(gv.PATH)
+    # Target File in Target Path
+    fpath = path.join(gv.PATH, fname)
 
-    # Open the Target File
-    with open(fname, 'rb') as f:
-        fileSize, blockCount = encode._split_file(f, bsize)
+    # Look up the Cache with the current state of the Target File
+    st = stat(fpath) if f is None else fstat(f.fileno())
+    key = (fpath, bsize, st.st_mtime_ns, st.st_size)
+
+    if key in _founCache:
+        return _founCache[key]
 
     # Determine Value of K
-    calculated_K = len(blockCount)
-    logger.debug("FileSize in KB:%0.2f" % (fileSize / 1000))
-    logger.debug("No. of Blocks:%d" % calculated_K)
+    # - same as number of padded blocks from encode._split_file
+    #   without reading the whole file
+    fileSize = st.st_size
+    calculated_K = -(-fileSize // bsize)
+    logger.debug("FileSize in KB:%0.2f", fileSize / 1000)
+    logger.debug("No. of Blocks:%d", calculated_K)
 
     # Determine Value of Gamma
-    calculated_Gamma = \
-        sqrt(calculated_K) * (log(calculated_K / DEFAULT_DELTA)) ** 2 \
-        / calculated_K
+    # - an empty file has no Blocks to send
+    if calculated_K == 0:
+        calculated_Gamma = 0.0
+    else:
+        calculated_Gamma = \
+            (log(calculated_K / DEFAULT_DELTA) ** 2) / sqrt(calculated_K)
+
+    logger.debug("Value of Gamma: %f", calculated_Gamma)
 
-    logger.debug("Value of Gamma: %f" % calculated_Gamma)
+    _founCache[key] = calculated_K, calculated_Gamma
 
     return calculated_K, calculated_Gamma
 
@@ -125,7 +161,15 @@ def CheckConsistency(incomingVersion):
         If We are ahead => Start a Fountain of the Update
     """
 
-    logger.debug("theirs:%d, ours:%d" % (incomingVersion, gv.VERSION))
+    global _founCacheVersion
+
+    logger.debug("theirs:%d, ours:%d", incomingVersion, gv.VERSION)
+
+    if _founCacheVersion != gv.VERSION:
+        # Our Version advanced
+        # - Fountain Parameters of older files are stale
+        _founCache.clear()
+        _founCacheVersion = gv.VERSION
 
     if gv.VERSION == incomingVersion:
         # If values are same
@@ -136,10 +180,10 @@ def CheckConsistency(incomingVersion):
             # c >= k an if the timer resets
             # chances are we might spray an unecessary fountain once
             # if that is the case: rather send a TrickleMessage
-            setattr(gv.tt, 'function', gv.mcastSock.send)
-            setattr(gv.tt, 'kwargs', {'message': pack('!H', gv.VERSION),
-                                      'host': gv.MCAST_GRP,
-                                      'port': gv.MCAST_PORT})
+            gv.tt.function = gv.mcastSock.send
+            gv.tt.kwargs = {'message': VERSION_STRUCT.pack(gv.VERSION),
+                            'host': gv.MCAST_GRP,
+                            'port': gv.MCAST_PORT}
         logger.info("Consistent")
         gv.tt.hear_consistent()
     else:
@@ -161,11 +205,11 @@ def CheckConsistency(incomingVersion):
             # Global trickleTimer instance called tt
 
             # Set the function
-            setattr(gv.tt, 'function', fountain)
+            gv.tt.function = fountain
             # Set the Arguments
-            setattr(gv.tt, 'kwargs', {'fname': gv.FILENAME,
-                                      'bsize': gv.BLOCKSIZE,
-                                      'ver': gv.VERSION})
+            gv.tt.kwargs = {'fname': gv.FILENAME,
+                            'bsize': gv.BLOCKSIZE,
+                            'ver': gv.VERSION}
 
             gv.tt.hear_inconsistent()
 
@@ -173,6 +217,79 @@ def CheckConsistency(incomingVersion):
     logger.info("Exiting Consistency Check")
 
 
+def sprayDroplets(f, bsize, footer, limit, queue, halt, perDatagram=1):
+    """
+    sprayDroplets: Producer of Droplets for the Fountain
+
+    @type f: file object
+    @param f: opened Target File
+
+    @type bsize: unsigned int
+    @param bsize: Blocksize of each encoded Block
+
+    @type footer: bytes object
+    @param footer: packed Version footer
+
+    @type limit: unsigned int
+    @param limit: number of Droplets to produce
+
+    @type queue: instance of queue.Queue
+    @param queue: channel to the sending thread
+
+    @type halt: instance of threading.Event
+    @param halt: set by the sending thread to stop encoding early
+
+    @type perDatagram: unsigned int
+    @param perDatagram: number of Droplets packed into one datagram
+
+    @default perDatagram: 1
+
+    Description:
+        Runs in its own thread so LT-encoding overlaps with sending.
+        Droplets are concatenated into datagrams of up to perDatagram
+        Droplets. Puts lists of up to BATCHSIZE datagrams on the queue,
+        followed by None once the limit is reached or halt is set.
+        If encoding fails, the Droplets encoded so far are still put
+        on the queue, followed by the exception instead of None.
+    """
+
+    batch = []
+    datagram = []
+    packetCounter = 0
+
+    try:
+        for eachBlock in encoder(f, bsize):
+
+            if halt.is_set():
+                break
+
+            datagram.append(eachBlock)
+            datagram.append(footer)
+            packetCounter += 1
+
+            if len(datagram) >= 2 * perDatagram or packetCounter >= limit:
+                batch.append(b''.join(datagram))
+                datagram = []
+
+            if packetCounter >= limit:
+                queue.put(batch)
+                break
+
+            if len(batch) >= gv.BATCHSIZE:
+                queue.put(batch)
+                batch = []
+
+    except Exception as err:
+        if datagram:
+            batch.append(b''.join(datagram))
+        if batch:
+            queue.put(batch)
+        queue.put(err)
+
+    else:
+        queue.put(None)
+
+
 def fountain(fname=gv.FILENAME, bsize=gv.BLOCKSIZE, ver=gv.VERSION):
     """
     fountain: Data Dissemination via Fountain
@@ -195,56 +312,103 @@ def fountain(fname=gv.FILENAME, bsize=gv.BLOCKSIZE, ver=gv.VERSION):
         1. Determine the K, Gamma values of the target File
         2. Open the File and perform the LT-Encoded Block
         3. Add 2B Version Footer at end of each Encoded Block
-        4. Send the Droplet to Multicast Channel
+        4. Send the Droplets to Multicast Channel, several per datagram
+           if they fit into MCAST_PAYLOAD
         5. Check for the Sending Limit => (1+Gamma)*K
         6. If Limit is reached Stop the Fountain
     """
 
-    # Step 1:
-    k, g = FounParameters(fname, bsize)
-
     # Step 2:
-    chdir(gv.PATH)
-
-    with open(fname, 'rb') as f:
+    # Open the File once for both Parameters and Encoding
+    with open(path.join(gv.PATH, fname), 'rb') as f:
 
-        # Limit Check Counter
-        packetCounter = 0
+        # Step 1:
+        # - served from the cache filled at startup or on Version update,
+        #   an fstat() makes sure the file has not changed since
+        k, g = FounParameters(fname, bsize, f)
 
-        while True:
-            # Time Stamp @ beginning
-            timeStamp1 = datetime.datetime.now().replace(microsecond=0)
+        if k == 0:
+            logger.error("Empty File, nothing to spray")
+            return
 
-            logger.info("Start Fountain")
+        # Sending Limit => (1+Gamma)*K
+        limit = ceil((1 + round(g, 1)) * k)
 
-            # Encode Each Block
-            for eachBlock in encode.encoder(f, bsize):
-
-                # Step 3:
-                droplet = addFooter(eachBlock, gv.VERSION)
-
-                try:
-                    # Step 4:
-                    # Send to all the Multicast Members.
-                    gv.mcastSock.send(droplet, gv.MCAST_GRP)
-                    packetCounter += 1
+        # Sent datagrams Counter
+        packetCounter = 0
 
-                    # Step 5:
-                    if (packetCounter >= (1 + round(g, 1)) * k):
+        # Version footer is the same for the whole Fountain
+        footer = VERSION_STRUCT.pack(ver)
+
+        # Droplets per datagram, for small Blocksizes
+        perDatagram = max(1, gv.MCAST_PAYLOAD //
+                          (HEADERSIZE + bsize + len(footer)))
+
+        # Raw send of the Multicast Socket
+        sendto = gv.mcastSock.sock.sendto
+
+        # Time Stamp @ beginning
+        timeStamp1 = monotonic()
+
+        logger.info("Start Fountain")
+
+        # Step 2, 3 & 5:
+        # Encode Each Block in a separate thread
+        queue = Queue(QUEUESIZE)
+        halt = Event()
+        producer = Thread(target=sprayDroplets,
+                          args=(f, bsize, footer, limit, queue, halt,
+                                perDatagram))
+        producer.daemon = True
+        producer.start()
+
+        for batch in iter(queue.get, None):
+
+            if isinstance(batch, Exception):
+                # Encoding failed in the producer
+                logger.error("Error while encoding the Fountain")
+                producer.join()
+                raise batch
+
+            try:
+                # Step 4:
+                # Send to all the Multicast Members
+                if gv.BATCHSIZE == 1:
+                    # one Droplet at a time
+                    # - non-blocking like Socket.send, waits
+                    #   for room in the send buffer if it is full
+                    for droplet in batch:
+                        while True:
+                            try:
+                                sendto(droplet, SEND_FLAGS, _MCAST_ADDR)
+                                break
+                            except BlockingIOError:
+                                gv.mcastSock.waitWritable()
+
+                else:
+                    gv.mcastSock.sendBatch(batch, *_MCAST_ADDR)
+
+                packetCounter += len(batch)
+
+            except socket.error as sockErr:
+                logger.error("Error in Socket while sending via Fountain")
+
+                # stop the producer, it may be blocked on a full queue
+                halt.set()
+                for batch in iter(queue.get, None):
+                    if isinstance(batch, Exception):
+                        break
+                producer.join()
+                raise sockErr
 
-                        # Time Stamp @ End
-                        timeStamp2 = datetime.\
-                            datetime.now().replace(microsecond=0)
-                        # Some stats
-                        logger.debug("Droplets sent %d" % packetCounter)
-                        logger.debug("time needed %s s" % (
-                            timeStamp2 - timeStamp1))
+        producer.join()
 
-                        # Step 6:
-                        logger.info("Closing Fountain")
-                        break
+        # Time Stamp @ End
+        timeStamp2 = monotonic()
+        # Some stats
+        logger.debug("Droplets sent %d in %d datagrams",
+                     limit, packetCounter)
+        logger.debug("time needed %.3f s", timeStamp2 - timeStamp1)
 
-                except socket.error as sockErr:
-                    raise sockErr
-                    logger.error("Error in Socket while sending via Fountain")
-            break
+        # Step 6:
+        logger.info("Closing Fountain")
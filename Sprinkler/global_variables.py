@@ -41,13 +41,30 @@ MCAST_PORT = 30001
 # TTL value for Multicasting
 MCAST_TTL = 2
 
+# Send Buffer of the Multicast Socket in Bytes
+# Room for a Fountain burst, clamped by the kernel to net.core.wmem_max
+MCAST_SNDBUF = 1 << 21
+
+# UDP payload of one datagram without IPv6 fragmentation
+# 1500 MTU - 40 IPv6 Header - 8 UDP Header
+MCAST_PAYLOAD = 1452
+
 # Luby-Transform Block Size
 BLOCKSIZE = 1452
 
+# Number of Droplets handed to the Socket at once
+# 1 keeps sending one Droplet at a time (e.g. for rate-limiting)
+BATCHSIZE = 64
+
 # Filename for Encoding
 # Default name chosen due to design
 FILENAME = "incomingData0.tar"
 
+# Fountain Parameters of FILENAME
+# set at startup and whenever VERSION advances
+K = None
+GAMMA = None
+
 # Path Variable for the Filename
 # Path is for Raspberry Pi
 PATH = "/home/pi/incoming"
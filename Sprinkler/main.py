@@ -25,8 +25,9 @@ import argparse
 import sys
 from Sprinkler.Socket import Socket
 from Sprinkler.trickle import trickleTimer
-from struct import pack
 from Sprinkler.bucket import bucket
+from Sprinkler.fountain import FounParameters, VERSION_STRUCT
+from Sprinkler.droplet import warmUp
 from os import chdir, path
 import logging
 
@@ -80,7 +81,13 @@ def main(args):
             print("File Does not Exist")
             sys.exit(1)
 
-    logger.debug("Starting with Version %d" % gv.VERSION)
+    logger.debug("Starting with Version %d", gv.VERSION)
+
+    # Fountain Parameters ready before the first Fountain
+    gv.K, gv.GAMMA = FounParameters(gv.FILENAME, gv.BLOCKSIZE)
+
+    # Compile the LT-encoding kernels before the Trickle Timer runs
+    warmUp()
 
     logger.info("Creating Socket..")
 
@@ -91,7 +98,7 @@ def main(args):
 
     logger.info("Configuring Trickle Timer")
 
-    initArgs = {'message': pack('!H', gv.VERSION),
+    initArgs = {'message': VERSION_STRUCT.pack(gv.VERSION),
                 'host': gv.MCAST_GRP,
                 'port': gv.MCAST_PORT}
 
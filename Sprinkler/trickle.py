@@ -64,8 +64,8 @@ class trickleTimer(object):
         # store the function, so that it can be rescheduled multiple times
         self.function = function
         self.kwargs = kwargs
-        logger.debug("next trickle timer is set to run in t = %f seconds"
-                     % self.t)
+        logger.debug("next trickle timer is set to run in t = %f seconds",
+                     self.t)
         self.lock = RLock()
         self.thread = Timer(self.t, self.__run)
         self.thread.daemon = True
@@ -118,8 +118,8 @@ class trickleTimer(object):
 
             # set the new timer
             self.t = uniform(self.I / 2, self.I)
-            logging.debug("next trickle timer is set to run in %f seconds"
-                          % self.t)
+            logging.debug("next trickle timer is set to run in %f seconds",
+                          self.t)
 
             try:
                 self.thread.cancel()  # should never be needed
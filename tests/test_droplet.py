@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+
+# TWIN node - A Flexible Testbed for Wireless Sensor Networks
+# Copyright (C) 2016, Communication Networks, University of Bremen, Germany
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; version 3 of the License.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY
+# or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>
+#
+# This file is part of TWIN
+
+"""Wire compatibility of Sprinkler.droplet with lt-code.
+   Receivers decode with lt-code, so Droplets must be byte-identical
+"""
+
+from itertools import islice
+from random import Random
+
+import pytest
+
+pytest.importorskip("lt")
+pytest.importorskip("numpy")
+
+from lt import encode  # noqa: E402
+from Sprinkler import droplet  # noqa: E402
+
+# File size not a multiple of any Blocksize below
+# - exercises the padding of the last Block
+DATA = bytes(Random(1).getrandbits(8) for _ in range(100003))
+SEED = 12345
+COUNT = 300
+
+
+def expected(blocksize, tmp_path):
+    path = tmp_path / "expected.tar"
+    path.write_bytes(DATA)
+    with open(str(path), 'rb') as f:
+        return list(islice(encode.encoder(f, blocksize, SEED), COUNT))
+
+
+def encoded(blocksize, tmp_path):
+    path = tmp_path / "encoded.tar"
+    path.write_bytes(DATA)
+    with open(str(path), 'rb') as f:
+        return list(islice(droplet.encoder(f, blocksize, SEED), COUNT))
+
+
+@pytest.mark.parametrize("blocksize", [100, 1452])
+def test_numba_encoder_matches_lt(blocksize, tmp_path):
+    if droplet.njit is None:
+        pytest.skip("numba not installed")
+
+    assert encoded(blocksize, tmp_path) == expected(blocksize, tmp_path)
+
+
+@pytest.mark.parametrize("blocksize", [100, 1452])
+def test_numpy_encoder_matches_lt(blocksize, tmp_path, monkeypatch):
+    monkeypatch.setattr(droplet, "njit", None)
+
+    assert encoded(blocksize, tmp_path) == expected(blocksize, tmp_path)